@@ -1,29 +1,69 @@
-import json
 import os
+import re
 import telebot
 import logging
+import logging.handlers
+import queue
+import atexit
 import sys
+import threading
+import time
 from datetime import datetime
 from report_generator import generate_report
+import polymarket_api as api
 
 # --- LOGGING SETUP ---
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - [%(filename)s:%(lineno)d] - %(message)s',
-    handlers=[
-        logging.FileHandler("bot_activity.log"),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
+# Handler threads only enqueue records; a background listener does the
+# actual file/console writes so logging never blocks a request.
+LOG_FORMAT = '%(asctime)s - %(levelname)s - [%(filename)s:%(lineno)d] - %(message)s'
+LOG_FLUSH_INTERVAL = 5.0
+
+
+def setup_logging():
+    """Configures queue-based logging once; later calls (e.g. a re-import) are no-ops."""
+    root_logger = logging.getLogger()
+    if any(isinstance(h, logging.handlers.QueueHandler) for h in root_logger.handlers):
+        return
+
+    log_queue = queue.Queue(-1)
+    root_logger.setLevel(logging.INFO)
+    root_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+
+    file_handler = logging.FileHandler("bot_activity.log")
+    stream_handler = logging.StreamHandler(sys.stdout)
+    for handler in (file_handler, stream_handler):
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    # Buffer file writes; flush in batches, immediately on ERROR, and at least every few seconds
+    buffered_file_handler = logging.handlers.MemoryHandler(
+        capacity=200, flushLevel=logging.ERROR, target=file_handler, flushOnClose=True
+    )
+
+    def flush_periodically():
+        while True:
+            time.sleep(LOG_FLUSH_INTERVAL)
+            buffered_file_handler.flush()
+
+    threading.Thread(target=flush_periodically, name="log-flusher", daemon=True).start()
+
+    log_listener = logging.handlers.QueueListener(log_queue, buffered_file_handler, stream_handler, respect_handler_level=True)
+    log_listener.start()
+    # atexit runs in reverse order: stop the listener first, then flush the buffer
+    atexit.register(buffered_file_handler.close)
+    atexit.register(log_listener.stop)
+
+setup_logging()
 logger = logging.getLogger(__name__)
 
 
+# Matches the leading "/command" of a message (stops before any "@BotName")
+_CMD_RE = re.compile(r'^/([A-Za-z0-9_]+)')
+
 def load_events():
+    """Loads events.json into {command: {'url': url, 'slug': slug}}, dropping invalid commands and malformed URLs."""
     try:
-        with open('events.json', 'r') as f:
-            events = json.load(f)
-            logger.info(f"Events loaded successfully: {list(events.keys())}")
-            return events
+        with open('events.json', 'rb') as f:
+            raw_events = api.json_loads(f.read())
     except FileNotFoundError:
         logger.warning("events.json not found. No dynamic commands loaded.")
         return {}
@@ -31,11 +71,79 @@ def load_events():
         logger.error(f"Error loading events.json: {e}")
         return {}
 
+    events = {}
+    for command, url in raw_events.items():
+        if not _CMD_RE.fullmatch(f"/{command}"):
+            logger.error(f"Skipping /{command}: command names may only contain letters, digits and underscores")
+            continue
+        slug = api.extract_event_slug(url) if isinstance(url, str) else None
+        if not slug:
+            logger.error(f"Skipping /{command}: could not extract event slug from {url!r}")
+            continue
+        events[command] = {'url': url, 'slug': slug}
+
+    logger.info(f"Events loaded successfully: {list(events.keys())}")
+    return events
+
+def build_help_text(events):
+    """Builds the static /help message from the loaded events."""
+    events_list_text = ""
+    for command, event in events.items():
+        # Escape underscores for Markdown so the command doesn't turn italic
+        clean_cmd = command.replace("_", "\\_")
+        events_list_text += f"🔹 /{clean_cmd}\n   🔗 [View Market Source]({event['url']})\n\n"
+
+    return (
+        "📊 **Available Markets**\n"
+        "Select a command below to generate a real-time odds report:\n\n"
+        f"{events_list_text}"
+        "───────────────────\n"
+        "💡 To add a new tracker, commit a request to update `events.json` in [Github](https://github.com/sadraheydari/polymarket_telegram_bot)."
+    )
+
 BOT_TOKEN = os.getenv('TELEGRAM_TOKEN')
+# Comma-separated Telegram user IDs allowed to run admin commands (e.g. /refresh)
+ADMIN_IDS = {int(uid) for uid in os.getenv('TELEGRAM_ADMIN_IDS', '').split(',') if uid.strip().isdigit()}
 EVENTS_MAP = load_events()
+# EVENTS_MAP is fixed for the process lifetime, so the help text is built once
+HELP_TEXT = build_help_text(EVENTS_MAP)
+
+# --- OUTGOING RATE LIMIT ---
+# Telegram allows a bot roughly 30 messages/s overall; stay just under it so
+# bursts are paced here instead of being rejected with 429s.
+SEND_RATE = 28  # messages per second (also the burst size)
+
+_send_lock = threading.Lock()
+_send_tokens = float(SEND_RATE)
+_send_last_refill = time.monotonic()
+
+def throttle_send():
+    """Blocks until the bot-wide token bucket allows one more outgoing message."""
+    global _send_tokens, _send_last_refill
+    while True:
+        with _send_lock:
+            now = time.monotonic()
+            _send_tokens = min(SEND_RATE, _send_tokens + (now - _send_last_refill) * SEND_RATE)
+            _send_last_refill = now
+            if _send_tokens >= 1:
+                _send_tokens -= 1
+                return
+            wait = (1 - _send_tokens) / SEND_RATE
+        time.sleep(wait)
+
+class ThrottledTeleBot(telebot.TeleBot):
+    """TeleBot whose sends go through throttle_send (reply_to uses send_message)."""
+
+    def send_message(self, *args, **kwargs):
+        throttle_send()
+        return super().send_message(*args, **kwargs)
+
+    def send_photo(self, *args, **kwargs):
+        throttle_send()
+        return super().send_photo(*args, **kwargs)
 
 # Initialize Bot
-bot = telebot.TeleBot(BOT_TOKEN)
+bot = ThrottledTeleBot(BOT_TOKEN)
 logger.info("--- Polymarket Bot Initialized ---")
 
 # --- WELCOME HANDLER (/start) ---
@@ -70,42 +178,41 @@ def send_help(message):
         bot.reply_to(message, "⚠️ No events configured. Check `events.json`.")
         return
 
-    # Build the list of commands dynamically
-    events_list_text = ""
-    for command, url in EVENTS_MAP.items():
-        # Escape underscores for Markdown so the command doesn't turn italic
-        clean_cmd = command.replace("_", "\\_")
-        events_list_text += f"🔹 /{clean_cmd}\n   🔗 [View Market Source]({url})\n\n"
-
-    help_text = (
-        "📊 **Available Markets**\n"
-        "Select a command below to generate a real-time odds report:\n\n"
-        f"{events_list_text}"
-        "───────────────────\n"
-        "💡 To add a new tracker, commit a request to update `events.json` in [Github](https://github.com/sadraheydari/polymarket_telegram_bot)."
-    )
-    
     # disable_web_page_preview=True keeps the chat clean from URL previews
-    bot.reply_to(message, help_text, parse_mode="Markdown", disable_web_page_preview=True)
+    bot.reply_to(message, HELP_TEXT, parse_mode="Markdown", disable_web_page_preview=True)
+
+# --- ADMIN HANDLER (/refresh) ---
+@bot.message_handler(commands=['refresh'])
+def refresh_cache(message):
+    user_id = message.from_user.id
+    username = message.from_user.username or "Unknown"
+
+    if user_id not in ADMIN_IDS:
+        logger.warning(f"Unauthorized /refresh attempt by {username} ({user_id})")
+        return
+
+    api.cache_clear()
+    logger.info(f"API cache cleared by admin {username} ({user_id})")
+    bot.reply_to(message, "♻️ Cache cleared. Next reports will fetch fresh data.")
 
 # --- DYNAMIC COMMAND HANDLER ---
-@bot.message_handler(func=lambda message: message.text.startswith('/') and message.text.split()[0][1:] in EVENTS_MAP)
+@bot.message_handler(commands=list(EVENTS_MAP.keys()))
 def handle_dynamic_command(message):
-    # Extract command (remove '/' and take first word)
-    command = message.text.split()[0][1:]
-    event_url = EVENTS_MAP.get(command)
+    # Extract command without the '/' or any '@BotName' suffix
+    command = _CMD_RE.match(message.text).group(1)
+    event = EVENTS_MAP[command]
     
     # Log the Request
     user_id = message.from_user.id
     username = message.from_user.username or "Unknown"
     chat_id = message.chat.id
-    logger.info(f"COMMAND: /{command} | USER: {username} ({user_id}) | URL: {event_url}")
+    logger.info(f"COMMAND: /{command} | USER: {username} ({user_id}) | SLUG: {event['slug']}")
     
     bot.send_message(chat_id, "🔍 **Fetching latest odds from Polymarket...**\nPlease wait while I generate the chart.", parse_mode="Markdown")
     
     try:
         # Generate Report
-        photo, table_text = generate_report(event_url)
+        photo, table_text = generate_report(event['slug'])
         
         if photo:
             logger.info(f"Report generated successfully for {username}. Sending...")
@@ -135,7 +242,8 @@ def echo_all(message):
 if __name__ == "__main__":
     try:
         logger.info("Starting polling loop...")
-        bot.infinity_polling()
+        # Long polling, and only message updates since that's all the bot handles
+        bot.infinity_polling(timeout=60, long_polling_timeout=60, allowed_updates=["message"])
     except KeyboardInterrupt:
         logger.info("Bot stopped by user.")
     except Exception as e:
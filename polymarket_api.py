@@ -1,57 +1,189 @@
+import numpy as np
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
+import os
 import time
+import functools
+import threading
+import atexit
 from datetime import datetime, timedelta, timezone
 from urllib.parse import urlparse
 
+# orjson decodes large price histories much faster; fall back to stdlib json
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
+
 # API Endpoints
 GAMMA_API_URL = "https://gamma-api.polymarket.com/events/slug"
 MARKET_API_URL = "https://gamma-api.polymarket.com/markets/slug"
 CLOB_HISTORY_API_URL = "https://clob.polymarket.com/prices-history"
 
+# Cache TTLs (seconds)
+EVENT_CACHE_TTL = 300
+HISTORY_CACHE_TTL = 30
+
+_CACHE_LOCK = threading.RLock()
+_CACHES = []
+
+def ttl_cache(ttl, maxsize=256, key=None, cache_if=bool):
+    """
+    Memoizes a single-argument function for `ttl` seconds.
+    `key` optionally maps the argument to a hashable cache key; if it
+    returns None the call bypasses the cache.
+    Only results passing `cache_if` are stored; by default empty results
+    (failed fetches) are not cached so the next call retries.
+    """
+    def decorator(func):
+        entries = {}
+        _CACHES.append(entries)
+
+        @functools.wraps(func)
+        def wrapper(arg):
+            cache_key = key(arg) if key else arg
+            if cache_key is None:
+                return func(arg)
+
+            now = time.monotonic()
+            with _CACHE_LOCK:
+                hit = entries.get(cache_key)
+                if hit and now - hit[0] < ttl:
+                    return hit[1]
+
+            value = func(arg)
+            if cache_if(value):
+                with _CACHE_LOCK:
+                    if len(entries) >= maxsize:
+                        # Drop expired entries first, then the oldest one if still full
+                        for k in [k for k, (ts, _) in entries.items() if now - ts >= ttl]:
+                            del entries[k]
+                        if len(entries) >= maxsize:
+                            del entries[min(entries, key=lambda k: entries[k][0])]
+                    entries[cache_key] = (now, value)
+            return value
+        return wrapper
+    return decorator
+
+def single_flight(func):
+    """
+    Deduplicates concurrent calls of a single-argument function.
+    Threads asking for a key that is already being fetched wait for that
+    fetch and share its result (or its exception) instead of issuing their
+    own request.
+    """
+    inflight = {}
+    lock = threading.Lock()
+
+    @functools.wraps(func)
+    def wrapper(key):
+        with lock:
+            call = inflight.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = inflight[key] = {"done": threading.Event(), "result": None, "error": None}
+
+        if not is_leader:
+            call["done"].wait()
+            if call["error"] is not None:
+                raise call["error"]
+            return call["result"]
+
+        try:
+            call["result"] = func(key)
+            return call["result"]
+        except Exception as e:
+            call["error"] = e
+            raise
+        finally:
+            with lock:
+                inflight.pop(key, None)
+            call["done"].set()
+    return wrapper
+
+def cache_clear():
+    """Drops every cached API response (and anything else cached with ttl_cache)."""
+    with _CACHE_LOCK:
+        for entries in _CACHES:
+            entries.clear()
+
 def get_headers():
     return {
         "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
         "Accept": "application/json"
     }
 
+# Shared session so TCP/TLS connections are reused across calls
+REQUEST_TIMEOUT = (3, 10)  # (connect, read) seconds
+
+_SESSION = requests.Session()
+_SESSION.headers.update(get_headers())
+_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=50,
+    max_retries=Retry(total=2, backoff_factor=0.3, status_forcelist=[502, 503, 504]),
+))
+
 def parse_stringified_list(data):
     """Parses fields that might be JSON strings (e.g. "['Yes', 'No']")."""
     if isinstance(data, str):
         try:
-            return json.loads(data)
-        except json.JSONDecodeError:
+            return json_loads(data)
+        except ValueError:
             return []
     return data
 
-def get_event_markets(url):
-    """Fetches the event summary from the Event URL."""
-    try:
-        parsed = urlparse(url)
-        path_parts = parsed.path.strip("/").split("/")
-        # Extract slug: usually the last part, or the part after 'event'
-        slug = path_parts[-1] if "event" not in path_parts else path_parts[path_parts.index("event") + 1]
+def extract_event_slug(url):
+    """Extracts the event slug from a Polymarket event URL; returns None if there is none."""
+    path_parts = [p for p in urlparse(url).path.split("/") if p]
+    # Extract slug: usually the last part, or the part after 'event'
+    if "event" in path_parts:
+        idx = path_parts.index("event") + 1
+        return path_parts[idx] if idx < len(path_parts) else None
+    return path_parts[-1] if path_parts else None
 
+@ttl_cache(EVENT_CACHE_TTL)
+@single_flight
+def get_event_markets_by_slug(slug):
+    """Fetches the event summary for an event slug."""
+    try:
         print(f"DEBUG: Fetching Event Slug: {slug}")
-        response = requests.get(f"{GAMMA_API_URL}/{slug}", headers=get_headers())
+        response = _SESSION.get(f"{GAMMA_API_URL}/{slug}", timeout=REQUEST_TIMEOUT)
         response.raise_for_status()
-        data = response.json()
+        data = json_loads(response.content)
         return data.get('markets', [])
     except Exception as e:
         print(f"Error fetching event: {e}")
         return []
 
+def get_event_markets(url):
+    """Fetches the event summary from the Event URL."""
+    slug = extract_event_slug(url)
+    if not slug:
+        print(f"Error fetching event: no slug in URL {url}")
+        return []
+    return get_event_markets_by_slug(slug)
+
+@ttl_cache(EVENT_CACHE_TTL)
 def fetch_full_market_details(market_slug):
     """Fetches detailed market data if the event summary is incomplete."""
     try:
         url = f"{MARKET_API_URL}/{market_slug}"
-        response = requests.get(url, headers=get_headers())
+        response = _SESSION.get(url, timeout=REQUEST_TIMEOUT)
         if response.status_code == 200:
-            return response.json()
+            return json_loads(response.content)
     except Exception:
         pass
     return None
 
+def _market_id(market):
+    return market.get('id') or market.get('conditionId')
+
+# Token IDs only change with the event data, so they share its TTL
+@ttl_cache(EVENT_CACHE_TTL, maxsize=1024, key=_market_id)
 def get_yes_token_id(market):
     """
     Robustly extracts the Token ID for the 'Yes' outcome.
@@ -83,8 +215,82 @@ def get_yes_token_id(market):
             pass
     return None
 
+def _history_to_arrays(history):
+    """Converts a list of {'t': ts, 'p': price} points to time-sorted NumPy arrays."""
+    ts = np.fromiter((h['t'] for h in history), dtype=np.int64, count=len(history))
+    ps = np.fromiter((h['p'] for h in history), dtype=np.float64, count=len(history))
+    order = np.argsort(ts, kind='stable')
+    return ts[order], ps[order]
+
+# Index of the 24h-window strategy that last returned data, per token_id.
+# Persisted so restarts don't fall back to probing every strategy again.
+# Only the 24h-window strategies are remembered; 'max' is a one-off fallback.
+STRATEGY_CACHE_FILE = "strategy_cache.json"
+STRATEGY_SAVE_EVERY = 20
+STRATEGY_CACHE_MAXSIZE = 1024  # least recently fetched tokens are dropped beyond this
+WINDOW_STRATEGY_COUNT = 2
+
+_strategy_lock = threading.Lock()
+_strategy_updates = 0  # changes since the last save
+
+def _load_winning_strategies():
+    try:
+        with open(STRATEGY_CACHE_FILE, 'rb') as f:
+            data = json_loads(f.read())
+        entries = [(str(k), int(v)) for k, v in data.items() if 0 <= int(v) < WINDOW_STRATEGY_COUNT]
+        # The file is saved oldest-first, so keep its most recent tail
+        return dict(entries[-STRATEGY_CACHE_MAXSIZE:])
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        print(f"Error loading {STRATEGY_CACHE_FILE}: {e}")
+        return {}
+
+_winning_strategy = _load_winning_strategies()
+
+def _save_winning_strategies():
+    global _strategy_updates
+    # Write under the lock to a temp file and swap it in, so concurrent or
+    # interrupted saves never leave a partially written cache behind
+    tmp_path = f"{STRATEGY_CACHE_FILE}.tmp"
+    with _strategy_lock:
+        if not _strategy_updates:
+            return  # nothing changed since the last save (or since load)
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(_winning_strategy, f)
+            os.replace(tmp_path, STRATEGY_CACHE_FILE)
+            _strategy_updates = 0
+        except Exception as e:
+            print(f"Error saving {STRATEGY_CACHE_FILE}: {e}")
+
+atexit.register(_save_winning_strategies)
+
+def _record_winning_strategy(token_id, idx):
+    global _strategy_updates
+    if not 0 <= idx < WINDOW_STRATEGY_COUNT:
+        return
+    with _strategy_lock:
+        # Re-insert so dict order tracks recency; tokens of resolved markets
+        # stop being fetched and age out from the front
+        previous = _winning_strategy.pop(token_id, None)
+        _winning_strategy[token_id] = idx
+        if previous == idx:
+            return
+        _strategy_updates += 1
+        while len(_winning_strategy) > STRATEGY_CACHE_MAXSIZE:
+            del _winning_strategy[next(iter(_winning_strategy))]
+        should_save = _strategy_updates >= STRATEGY_SAVE_EVERY
+    if should_save:
+        _save_winning_strategies()
+
+@ttl_cache(HISTORY_CACHE_TTL)
+@single_flight
 def get_price_history(token_id):
-    """Fetches history for the last 24h."""
+    """
+    Fetches history for the last 24h.
+    Returns (timestamps, prices) as time-sorted int64/float64 arrays, or None if no data.
+    """
     end_time = int(time.time())
     start_time = int((datetime.now(timezone.utc) - timedelta(hours=24)).timestamp())
     
@@ -95,13 +301,22 @@ def get_price_history(token_id):
         {"params": {"market": token_id, "interval": "max"}}
     ]
 
-    for strat in strategies:
+    # Start with the 24h-window strategy that last worked for this token,
+    # then the other window strategy, and 'max' only as a last resort
+    first = _winning_strategy.get(token_id, 0)
+    if not 0 <= first < WINDOW_STRATEGY_COUNT:
+        first = 0
+    order = [first] + [i for i in range(WINDOW_STRATEGY_COUNT) if i != first]
+    order += list(range(WINDOW_STRATEGY_COUNT, len(strategies)))
+
+    for idx in order:
         try:
-            response = requests.get(CLOB_HISTORY_API_URL, params=strat['params'], headers=get_headers())
+            response = _SESSION.get(CLOB_HISTORY_API_URL, params=strategies[idx]['params'], timeout=REQUEST_TIMEOUT)
             if response.status_code == 200:
-                history = response.json().get('history', [])
+                history = json_loads(response.content).get('history', [])
                 if history:
-                    return history
+                    _record_winning_strategy(token_id, idx)
+                    return _history_to_arrays(history)
         except Exception:
             continue
-    return []
\ No newline at end of file
+    return None
@@ -1,12 +1,68 @@
 import matplotlib
 matplotlib.use('Agg') # Non-interactive backend
-import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
-import pandas as pd
+from matplotlib.figure import Figure
+import numpy as np
 import io
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import polymarket_api as api
 
+# Figures are expensive to build, so idle ones are pooled per subplot count
+# (and shared/independent x-axis) and reused. A figure is checked out while
+# a report renders on it.
+_FIG_CACHE = {}  # (n, sharex) -> [(fig, axs), ...]
+_FIG_CACHE_LOCK = threading.Lock()
+_TIME_FORMATTER = mdates.DateFormatter('%H:%M')
+
+# Panels share one time axis only when all histories fit in this window;
+# a longer 'max' fallback history would squash the 24h panels otherwise
+SHARED_AXIS_MAX_SPAN = np.timedelta64(2, 'D')
+
+# Seconds a rendered report is reused for the same event
+REPORT_CACHE_TTL = 45
+
+def _prepare_axes(axs, sharex):
+    """Shared x-axis: only the bottom panel carries (and formats) time labels."""
+    if not sharex:
+        return
+    for ax in axs[:-1]:
+        ax.tick_params(labelbottom=False)
+    axs[-1].xaxis.set_major_formatter(_TIME_FORMATTER)
+
+def _set_date_axis(ax):
+    """Independent x-axis: date-aware ticks that stay readable over multi-day spans."""
+    locator = mdates.AutoDateLocator()
+    ax.xaxis.set_major_locator(locator)
+    ax.xaxis.set_major_formatter(mdates.ConciseDateFormatter(locator))
+
+def _get_or_create_fig(n, sharex):
+    """Checks out an idle figure with `n` stacked axes, building one if none is free."""
+    with _FIG_CACHE_LOCK:
+        pool = _FIG_CACHE.get((n, sharex))
+        fig_axs = pool.pop() if pool else None
+
+    if fig_axs:
+        fig, axs = fig_axs
+        for ax in axs:
+            ax.clear()
+    else:
+        fig_height = max(3, n) * 2.2  # scale height with market count
+        # Fixed margins instead of a layout engine; set once per pooled figure
+        fig = Figure(figsize=(10, fig_height), constrained_layout=False)
+        axs = list(fig.subplots(n, 1, squeeze=False, sharex=sharex)[:, 0])
+        fig.suptitle("Polymarket Odds History (Last 24h)", fontsize=16, fontweight='bold')
+        fig.subplots_adjust(left=0.08, right=0.97, top=0.92, bottom=0.08, hspace=0.55)
+
+    _prepare_axes(axs, sharex)
+    return fig, axs
+
+def _release_fig(n, sharex, fig, axs):
+    """Returns a figure to the pool once its report has been saved."""
+    with _FIG_CACHE_LOCK:
+        _FIG_CACHE.setdefault((n, sharex), []).append((fig, axs))
+
 def parse_market_date(date_str):
     """Attempts to parse a date string like 'January 31' to a datetime; returns None on failure."""
     try:
@@ -22,16 +78,58 @@ def is_market_closed(market):
     closed_flag = market.get('closed') or market.get('isResolved')
     return closed_flag or status in {"closed", "resolved", "finalized"}
 
-def generate_report(event_url):
+def _fetch_market_data(item):
+    """
+    Resolves the 'Yes' token for a market and fetches its price history.
+    Runs on a worker thread, so it must not touch matplotlib.
+
+    Returns: (market, title, parsed_dt, (times, probs) or None, has_token)
+    """
+    market, title, parsed_dt = item
+
+    # Resolve Token ID
+    yes_token_id = api.get_yes_token_id(market)
+    if not yes_token_id:
+        # Fallback: fetch full details if missing in summary
+        slug = market.get('slug')
+        if slug:
+            full = api.fetch_full_market_details(slug)
+            if full:
+                yes_token_id = api.get_yes_token_id(full)
+
+    if not yes_token_id:
+        return market, title, parsed_dt, None, False
+
+    history = api.get_price_history(yes_token_id)
+    if history is None:
+        return market, title, parsed_dt, None, True
+
+    ts, ps = history  # already sorted by the API layer
+    return market, title, parsed_dt, (ts.astype('datetime64[s]'), ps * 100.0), True
+
+def generate_report(event_slug):
     """
     Main orchestrator.
-    1. Fetches markets from URL.
+    1. Fetches markets for the event slug.
     2. Plots all markets found for the event.
     3. Generates Plot & Table.
-    
+
+    Reports are memoized for a short time, so users asking for the same
+    event together share one render.
+
     Returns: (image_buffer, text_response)
     """
-    markets = api.get_event_markets(event_url)
+    png_bytes, table_text = _render_report(event_slug)
+    if png_bytes is None:
+        return None, table_text
+    # Fresh buffer per caller: sending a photo consumes the stream
+    return io.BytesIO(png_bytes), table_text
+
+@api.ttl_cache(REPORT_CACHE_TTL, cache_if=lambda report: report[0] is not None)
+@api.single_flight
+def _render_report(event_slug):
+    """Builds the report for an event. Returns: (png_bytes or None, text_response)"""
+    markets = api.get_event_markets_by_slug(event_slug)
     if not markets:
         return None, "Could not fetch event markets. Check the URL."
 
@@ -57,71 +155,66 @@ def generate_report(event_url):
     dated = sorted(dated, key=lambda x: x[2])
     ordered_markets = (dated + undated)[:5]
 
-    # 3. Setup Plot for selected markets
-    n = len(ordered_markets)
-    fig_height = max(3, n) * 2.5  # scale height with market count
-    fig, axs = plt.subplots(n, 1, figsize=(10, fig_height))
-    if n == 1:
-        axs = [axs]
-    fig.suptitle("Polymarket Odds History (Last 24h)", fontsize=16, fontweight='bold')
-    fig.subplots_adjust(hspace=0.8, top=0.92)
+    # 3. Fetch history for all selected markets concurrently (I/O bound)
+    with ThreadPoolExecutor(max_workers=5) as ex:
+        results = list(ex.map(_fetch_market_data, ordered_markets))
+
+    # 4. Setup Plot for selected markets (matplotlib stays on this thread)
+    n = len(results)
+    series_list = [r[3] for r in results if r[3] is not None]
+    sharex = bool(series_list) and (
+        max(t[-1] for t, _ in series_list) - min(t[0] for t, _ in series_list) <= SHARED_AXIS_MAX_SPAN
+    )
+    fig, axs = _get_or_create_fig(n, sharex)
 
     table_rows = []
 
-    for ax, (market, title, parsed_dt) in zip(axs, ordered_markets):
+    for ax, (market, title, parsed_dt, series, has_token) in zip(axs, results):
         group_date = title
         if parsed_dt:
             group_date = f"{title} ({parsed_dt.strftime('%Y-%m-%d')})"
-        
-        # Resolve Token ID
-        yes_token_id = api.get_yes_token_id(market)
-        if not yes_token_id:
-            # Fallback: fetch full details if missing in summary
-            slug = market.get('slug')
-            if slug:
-                full = api.fetch_full_market_details(slug)
-                if full:
-                    yes_token_id = api.get_yes_token_id(full)
-        
+
         current_val_str = "N/A"
-        
-        if yes_token_id:
-            history = api.get_price_history(yes_token_id)
-            if history:
-                df = pd.DataFrame(history)
-                df['t'] = pd.to_datetime(df['t'], unit='s')
-                df['p'] = df['p'] * 100
-                df = df.sort_values('t')
-
-                # Plot
-                ax.plot(df['t'], df['p'], label=f"{group_date}", linewidth=2, color='#007bff')
-                
-                # Annotate Current Value
-                current_val = df['p'].iloc[-1]
-                current_val_str = f"{current_val:.1f}%"
-                
-                ax.axhline(y=current_val, color='red', linestyle=':', alpha=0.8)
-                x_pos = df['t'].iloc[-1]
-                ax.text(x_pos + pd.Timedelta(minutes=10), current_val, current_val_str, 
-                        color='red', fontweight='bold', ha='left', va='bottom')
-
-                ax.set_title(f"{group_date}", loc='left', fontsize=12)
-                ax.set_ylabel("Prob (%)")
-                ax.grid(True, linestyle='--', alpha=0.5)
-                ax.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M'))
-            else:
-                ax.text(0.5, 0.5, "No History", ha='center', va='center')
+
+        if series is not None:
+            times, probs = series
+
+            # Plot
+            ax.plot(times, probs, label=f"{group_date}", linewidth=2, color='#007bff')
+
+            # Annotate Current Value
+            current_val = probs[-1]
+            current_val_str = f"{current_val:.1f}%"
+
+            ax.axhline(y=current_val, color='red', linestyle=':', alpha=0.8)
+            x_pos = times[-1]
+            ax.text(x_pos + np.timedelta64(10, 'm'), current_val, current_val_str, 
+                    color='red', fontweight='bold', ha='left', va='bottom')
+
+            ax.set_title(f"{group_date}", loc='left', fontsize=12)
+            ax.set_ylabel("Prob (%)")
+            ax.grid(True, linestyle='--', alpha=0.5)
+            if not sharex:
+                _set_date_axis(ax)
+        elif has_token:
+            ax.text(0.5, 0.5, "No History", ha='center', va='center', transform=ax.transAxes)
         else:
-            ax.text(0.5, 0.5, "Data Unavailable", ha='center', va='center')
+            ax.text(0.5, 0.5, "Data Unavailable", ha='center', va='center', transform=ax.transAxes)
 
         # Add to table
         table_rows.append(f"{group_date:<24} | {current_val_str}")
 
+    # Fixed 4-hourly ticks on the shared 24h window
+    if sharex:
+        axs[-1].xaxis.set_major_locator(mdates.HourLocator(interval=4))
+
     # Save
     buf = io.BytesIO()
-    plt.savefig(buf, format='png', dpi=100)
-    buf.seek(0)
-    plt.close()
+    try:
+        # 72 dpi and light zlib compression keep encoding cheap for a chat-sized image
+        fig.savefig(buf, format='png', dpi=72, bbox_inches=None, pil_kwargs={'compress_level': 1})
+    finally:
+        _release_fig(n, sharex, fig, axs)
 
     # Build Table String
     table_header = f"{'Market':<24} | {'Prob':<6}"
@@ -130,4 +223,4 @@ def generate_report(event_url):
     table_text += "\n".join(table_rows)
     table_text += "\n```"
 
-    return buf, table_text
\ No newline at end of file
+    return buf.getvalue(), table_text